@@ -3,23 +3,28 @@ Hackathon / Event Analytics Dashboard
 Connects to Google Sheets and visualizes event statistics with Plotly.
 """
 
+import os
 import subprocess
 import sys
 
 # `python app.py` must run under Streamlit; bare Python triggers ScriptRunContext warnings.
 # When started via `streamlit run app.py`, Streamlit is already in sys.modules — skip re-exec.
+# POSIX: exec replaces this process (no idle parent, Ctrl-C goes straight to Streamlit).
+# Windows has no real exec, so keep the child process there.
 if __name__ == "__main__" and "streamlit" not in sys.modules:
-    raise SystemExit(
-        subprocess.call([sys.executable, "-m", "streamlit", "run", __file__, *sys.argv[1:]])
-    )
+    _streamlit_cmd = [sys.executable, "-m", "streamlit", "run", __file__, *sys.argv[1:]]
+    if os.name == "posix":
+        os.execv(sys.executable, _streamlit_cmd)
+    raise SystemExit(subprocess.call(_streamlit_cmd))
 
 import html
 import json
 import logging
-import os
-import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import date, timedelta
+import numpy as np
 import streamlit as st
 import pandas as pd
 
@@ -32,9 +37,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 logger.info("Event Analytics Dashboard starting")
-import plotly.express as px
 import plotly.graph_objects as go
-from sheets_connector import load_sheet_data
+from sheets_connector import credentials_mtime, load_sheet_data
 from auth import verify_login, can_edit_sheet
 from config_helpers import (
     DEFAULT_CREDENTIALS_PATH,
@@ -45,12 +49,10 @@ from config_helpers import (
 )
 from utils import (
     extract_sheet_id,
-    safe_json_loads,
-    merge_json_dicts,
-    normalize_chart_label,
-    parse_daily_registrations,
-    daily_registrations_to_line_data,
-    aggregate_numeric_columns,
+    find_column,
+    write_json_atomic,
+    aggregate_all_json,
+    daily_registrations_line_data,
     COL_DAILY_REG,
     COL_GENDER,
     COL_COUNTRY,
@@ -104,16 +106,6 @@ def plotly_layout(**overrides):
     return out
 
 
-def _find_column(df: pd.DataFrame, *keywords: str):
-    if df is None or df.columns is None:
-        return None
-    lower_kw = [k.lower() for k in keywords]
-    for c in df.columns:
-        if all(k in str(c).strip().lower() for k in lower_kw):
-            return c
-    return None
-
-
 # ---------------------------------------------------------------------------
 # Page config
 # ---------------------------------------------------------------------------
@@ -412,12 +404,38 @@ def load_pinned_from_file():
 
 def save_pinned_to_file(pinned_list):
     try:
-        with open(PINNED_FILE, "w", encoding="utf-8") as f:
-            json.dump({"pinned": list(pinned_list)}, f, indent=2)
+        write_json_atomic(PINNED_FILE, {"pinned": list(pinned_list)}, separators=(",", ":"))
     except OSError as e:
         logger.warning("Could not save pinned initiatives: %s", e)
 
 
+@st.cache_resource
+def _pin_writer() -> dict:
+    """Process-wide single-thread writer; app.py re-executes per rerun, so it lives in cache_resource."""
+    return {"executor": ThreadPoolExecutor(max_workers=1, thread_name_prefix="pinned-writer"), "pending": None}
+
+
+def save_pinned_in_background(pinned_list):
+    """Queue a pinned-list save off the render path; a still-queued earlier save is superseded."""
+    writer = _pin_writer()
+    if writer["pending"] is not None:
+        writer["pending"].cancel()
+    writer["pending"] = writer["executor"].submit(save_pinned_to_file, list(pinned_list))
+
+
+def _pinned_file_mtime() -> float:
+    try:
+        return os.path.getmtime(PINNED_FILE)
+    except OSError:
+        return 0.0
+
+
+@st.cache_data(show_spinner=False)
+def _cached_pinned(mtime: float):
+    """Pinned list keyed on the file's mtime, so edits on disk invalidate the entry."""
+    return load_pinned_from_file()
+
+
 # ---------------------------------------------------------------------------
 # Auth
 # ---------------------------------------------------------------------------
@@ -454,14 +472,83 @@ if "sheet_id_input" not in st.session_state:
 if "selected_initiatives" not in st.session_state:
     st.session_state.selected_initiatives = []
 if "pinned_initiatives" not in st.session_state:
-    st.session_state.pinned_initiatives = load_pinned_from_file()
+    st.session_state.pinned_initiatives = _cached_pinned(_pinned_file_mtime())
 if "current_page" not in st.session_state:
     st.session_state.current_page = "dashboard"
 
 
-@st.cache_data(ttl=300)
+SHEET_CACHE_TTL = 300  # seconds
+
+
+@st.cache_data(persist="disk", max_entries=8, show_spinner=False)
+def _persisted_load_sheet(sheet_id: str, credentials_path: str, creds_mtime: int):
+    return time.time(), load_sheet_data(sheet_id, credentials_path)
+
+
 def cached_load_sheet(sheet_id: str, credentials_path: str):
-    return load_sheet_data(sheet_id, credentials_path)
+    """Sheet load persisted to disk so it survives restarts.
+    Streamlit ignores ttl on persisted caches, so the entry carries its fetch time and a stale
+    one is cleared (which also deletes its file) before reloading; the credentials file mtime
+    is keyed too so rotated creds force a reload."""
+    creds_mtime = credentials_mtime(credentials_path)
+    fetched_at, df = _persisted_load_sheet(sheet_id, credentials_path, creds_mtime)
+    if time.time() - fetched_at > SHEET_CACHE_TTL:
+        _persisted_load_sheet.clear(sheet_id, credentials_path, creds_mtime)
+        fetched_at, df = _persisted_load_sheet(sheet_id, credentials_path, creds_mtime)
+    return df
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _parse_daily(cells: tuple) -> tuple:
+    """Sorted (dates, counts) for the raw Daily Registrations cells; parsed once per distinct cell set."""
+    return daily_registrations_line_data(pd.Series(cells, dtype=object))
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _json_totals(cols: tuple, cells: tuple) -> dict:
+    """{column: {key: total}} for a set of JSON distribution columns, reduced in one groupby."""
+    frame = pd.DataFrame(dict(zip(cols, cells)), dtype=object)
+    return aggregate_all_json(frame, list(cols))
+
+
+def _section_totals(filtered_df: pd.DataFrame, cols: tuple) -> dict:
+    """Totals for the given columns that exist in filtered_df; each chart reads its own slice."""
+    present = tuple(c for c in cols if c in filtered_df.columns)
+    return _json_totals(present, tuple(tuple(filtered_df[c]) for c in present))
+
+
+def _sheet_derived(df: pd.DataFrame, key: str, build):
+    """Return build(df), recomputed only when df_raw is replaced (new sheet load), not on every rerun."""
+    cache = st.session_state.setdefault("_sheet_derived", {})
+    hit = cache.get(key)
+    if hit is None or hit[0] is not df:
+        hit = cache[key] = (df, build(df))
+    return hit[1]
+
+
+def _initiative_options(df: pd.DataFrame) -> list:
+    """Sorted unique initiative names, built once per sheet load."""
+    return _sheet_derived(df, "initiative_options",
+                          lambda d: sorted(pd.unique(d["Initiative Name"].dropna()).tolist()))
+
+
+def _initiative_rows(df: pd.DataFrame, name: str):
+    """Positional row indices for one initiative."""
+    index = _sheet_derived(df, "initiative_index", lambda d: d.groupby("Initiative Name", sort=False, observed=True).indices)
+    return index.get(name, [])
+
+
+def _build_kpi_table(df: pd.DataFrame) -> pd.DataFrame:
+    cols = [c for c in NUMERIC_KPI_COLUMNS if c in df.columns]
+    numeric = df[cols].apply(pd.to_numeric, errors="coerce").fillna(0)
+    return numeric.groupby(df["Initiative Name"], sort=False, observed=True).sum()
+
+
+def _initiative_kpis(df: pd.DataFrame, name: str) -> dict:
+    """KPI sums for one initiative, looked up from a per-sheet groupby table."""
+    table = _sheet_derived(df, "kpi_table", _build_kpi_table)
+    row = table.loc[name] if name in table.index else None
+    return {col: int(row[col]) if row is not None and col in table.columns else 0 for col in NUMERIC_KPI_COLUMNS}
 
 
 # ---------------------------------------------------------------------------
@@ -560,16 +647,26 @@ def progress_bar(current, target, label="Registration Progress"):
     )
 
 
+def donut_figure(counts: dict, palette: list) -> go.Figure:
+    """Donut chart built directly on go.Pie (no plotly.express DataFrame round-trip).
+    The palette goes in layout.piecolorway, as px.pie's color_discrete_sequence did, so plotly.js
+    colors slices after sorting by value. Labels are expected pre-normalized (aggregate_all_json)."""
+    return go.Figure(
+        go.Pie(values=list(counts.values()), labels=list(counts), hole=0.5),
+        layout=dict(piecolorway=palette),
+    )
+
+
 def sec_label(text: str):
     st.markdown(f'<div class="sec-label">{text}</div>', unsafe_allow_html=True)
 
 
 def distribution_to_table_df(items) -> pd.DataFrame:
-    """Build Label / Count / Share % table from a dict or list of (label, value) pairs."""
+    """Build Label / Count / Share % table from a dict or list of (label, value) pairs with display-ready labels."""
     if isinstance(items, dict):
-        rows = [{"Label": normalize_chart_label(k), "Count": int(v)} for k, v in items.items()]
+        rows = [{"Label": k, "Count": int(v)} for k, v in items.items()]
     else:
-        rows = [{"Label": normalize_chart_label(k), "Count": int(v)} for k, v in items]
+        rows = [{"Label": k, "Count": int(v)} for k, v in items]
     if not rows:
         return pd.DataFrame()
     df_out = pd.DataFrame(rows).sort_values("Count", ascending=False).reset_index(drop=True)
@@ -637,7 +734,7 @@ def render_event_settings_page():
         st.warning("Column 'Initiative Name' not found.")
         return
 
-    initiative_options = sorted(df[col_name].dropna().unique().tolist())
+    initiative_options = _initiative_options(df)
     config = load_event_dashboard_config()
 
     for i, name in enumerate(initiative_options):
@@ -647,23 +744,25 @@ def render_event_settings_page():
 
         st.markdown(f'<div class="settings-card"><h3>{name}</h3>', unsafe_allow_html=True)
         if is_editing:
-            link = st.text_input("Dashboard link", value=entry["dashboard_link"], key=f"link_{sk}", placeholder="https://...")
-            username = st.text_input("Admin username", value=entry["admin_username"], key=f"user_{sk}")
-            password = st.text_input("Admin password", value=entry["admin_password"], type="password", key=f"pass_{sk}")
-            reg_target = entry.get("registration_target") or 0
-            registration_target = st.number_input("Registration target", min_value=0, value=int(reg_target) if reg_target else 0, key=f"rt_{sk}")
-            c1, c2, _ = st.columns([1, 1, 3])
-            with c1:
-                if st.button("Save", key=f"save_{sk}", type="primary", use_container_width=True):
-                    config[name] = {"dashboard_link": (link or "").strip(), "admin_username": (username or "").strip(),
-                                    "admin_password": password or "", "registration_target": registration_target}
-                    save_event_dashboard_config(config)
-                    st.session_state.editing_event = None
-                    st.rerun()
-            with c2:
-                if st.button("Cancel", key=f"cancel_{sk}", use_container_width=True):
-                    st.session_state.editing_event = None
-                    st.rerun()
+            # A form submits all four fields together instead of rerunning per keystroke.
+            with st.form(f"edit_{sk}", border=False):
+                link = st.text_input("Dashboard link", value=entry["dashboard_link"], placeholder="https://...")
+                username = st.text_input("Admin username", value=entry["admin_username"])
+                password = st.text_input("Admin password", value=entry["admin_password"], type="password")
+                reg_target = entry.get("registration_target") or 0
+                registration_target = st.number_input("Registration target", min_value=0, value=int(reg_target) if reg_target else 0)
+                c1, c2, _ = st.columns([1, 1, 3])
+                with c1:
+                    saved = st.form_submit_button("Save", type="primary", use_container_width=True)
+                with c2:
+                    cancelled = st.form_submit_button("Cancel", use_container_width=True)
+            if saved:
+                config[name] = {"dashboard_link": (link or "").strip(), "admin_username": (username or "").strip(),
+                                "admin_password": password or "", "registration_target": registration_target}
+                save_event_dashboard_config(config)
+            if saved or cancelled:
+                st.session_state.editing_event = None
+                st.rerun()
         else:
             has_link = bool(entry["dashboard_link"])
             link_url = entry["dashboard_link"]
@@ -787,6 +886,303 @@ def render_login_page():
                 st.error("Invalid username or password.")
 
 
+# ---------------------------------------------------------------------------
+# Dashboard sections (fragments: a Chart/Table toggle reruns only its own section)
+# ---------------------------------------------------------------------------
+@st.fragment
+def render_daily(filtered_df: pd.DataFrame, rtarget: int) -> None:
+    sec_label("Registration Trend")
+    if COL_DAILY_REG in filtered_df.columns:
+        dates, counts = _parse_daily(tuple(filtered_df[COL_DAILY_REG].dropna().astype(str)))
+        if dates and counts:
+            with st.container(border=True):
+                REG_START_COL, REG_END_COL = "Registration Start Date", "Registration End Date"
+                average_daily = None
+                days_from_sheet = None
+                span_days = None
+                end_dt = None
+                has_start = REG_START_COL in filtered_df.columns
+                has_end = REG_END_COL in filtered_df.columns
+                if has_start and has_end:
+                    start_col, end_col = REG_START_COL, REG_END_COL
+                else:
+                    end_col = find_column(filtered_df, "registration", "end") if not has_end else REG_END_COL
+                    start_col = find_column(filtered_df, "registration", "start") if not has_start else REG_START_COL
+                    if not start_col:
+                        start_col = "Created At" if "Created At" in filtered_df.columns else None
+                    if not end_col or end_col not in filtered_df.columns:
+                        end_col = None
+                    if not start_col or start_col not in filtered_df.columns:
+                        start_col = None
+                if rtarget and end_col and start_col:
+                    row = filtered_df.iloc[0]
+                    sv, ev = row.get(start_col), row.get(end_col)
+                    if pd.notna(sv) and pd.notna(ev):
+                        # Scalar parses, as data_service does: on pandas 2 a batched dayfirst/"mixed"
+                        # parse reads ISO cells differently, and both dashboards must agree.
+                        sdt = pd.to_datetime(sv, errors="coerce", dayfirst=True)
+                        edt = pd.to_datetime(ev, errors="coerce", dayfirst=True)
+                        if pd.notna(sdt):
+                            sdt = sdt.normalize()
+                        if pd.notna(edt):
+                            edt = edt.normalize()
+                        end_dt = edt
+                        if pd.notna(sdt) and pd.notna(edt):
+                            days_from_sheet = max(1, (edt - sdt).days + 1)
+                            if days_from_sheet > 1:
+                                average_daily = rtarget / days_from_sheet
+                # Daily dates are parsed once; span and required-average mask both reuse didx.
+                # "mixed" infers the format per value, so keys in another format don't become NaT.
+                didx = pd.to_datetime(pd.Index(dates), errors="coerce", format="mixed").normalize()
+                valid = didx.dropna()
+                if rtarget and len(valid):
+                    span_days = max(1, (valid.max() - valid.min()).days + 1)
+                    if average_daily is None or (days_from_sheet and days_from_sheet <= 1):
+                        average_daily = rtarget / span_days
+
+                req_avg = None
+                tsf_used = None
+                dr_used = None
+                if rtarget and dates and counts and end_dt is not None:
+                    ets = end_dt
+                    mask = np.asarray(didx.notna() & (didx <= ets), dtype=bool)
+                    if mask.any():
+                        tsf = int(np.asarray(counts)[mask].sum())
+                        ld = didx[mask].max()
+                        dr = (ets - ld).days
+                        if dr > 0:
+                            req_avg = max(0, rtarget - tsf) / dr
+                            tsf_used, dr_used = tsf, dr
+                        elif average_daily is not None:
+                            req_avg = average_daily
+                            tsf_used, dr_used = tsf, 0
+
+                # NumPy arrays let Plotly ship typed (base64) arrays instead of JSON lists.
+                counts_np = np.asarray(counts, dtype=np.int64)
+                if didx.hasnans:
+                    # Unparseable keys: string x values stay categorical in the given order.
+                    x_dates = dates
+                else:
+                    # Keys arrive in string order, which isn't date order for non-ISO keys;
+                    # sort by the parsed dates so the cumulative line is summed chronologically.
+                    order = np.argsort(didx.values, kind="stable")
+                    counts_np = counts_np[order]
+                    x_dates = didx.values[order].astype("datetime64[D]")
+                if average_daily:
+                    bar_colors = np.where(counts_np >= average_daily, "#10b981", "#ef4444").tolist()
+                else:
+                    bar_colors = ["#818cf8"] * len(counts)
+                cum = np.cumsum(counts_np)
+
+                fig = go.Figure()
+                fig.add_trace(go.Bar(x=x_dates, y=counts_np, marker_color=bar_colors, marker_line_width=0,
+                                     name="Daily", opacity=0.75,
+                                     hovertemplate="<b>%{x}</b><br>Daily: %{y:,}<extra></extra>"))
+                fig.add_trace(go.Scatter(x=x_dates, y=cum, mode="lines+markers",
+                                         line=dict(color="#818cf8", width=2.5), marker=dict(size=4, color="#818cf8"),
+                                         name="Cumulative", yaxis="y2",
+                                         hovertemplate="<b>%{x}</b><br>Cumulative: %{y:,}<extra></extra>"))
+                fig.update_layout(
+                    **plotly_layout(), height=400, hovermode="x unified", showlegend=True, bargap=0.15,
+                    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1,
+                                font=dict(size=11, color=C["text2"]), bgcolor="rgba(0,0,0,0)"),
+                    xaxis_title="Date", yaxis_title="Daily",
+                    yaxis2=dict(title="Cumulative", overlaying="y", side="right", showgrid=False,
+                                title_font=dict(size=12, color="#818cf8"), tickfont=dict(size=11, color="#818cf8")),
+                )
+                if average_daily:
+                    fig.add_hline(y=average_daily, line_dash="dash", line_color="#f59e0b", line_width=1.5,
+                                  annotation_text=f"Avg: {round(average_daily):,}", annotation_position="bottom left",
+                                  annotation_font=dict(size=10, color="#f59e0b"),
+                                  annotation_bgcolor="rgba(15,23,42,0.85)", annotation_bordercolor="#f59e0b")
+                if req_avg is not None:
+                    lbl = f"Req: {round(req_avg):,}" if dr_used and dr_used > 0 else f"Period avg: {round(req_avg):,}"
+                    fig.add_hline(y=req_avg, line_dash="dot", line_color="#10b981", line_width=1.5,
+                                  annotation_text=lbl, annotation_position="top left",
+                                  annotation_font=dict(size=10, color="#10b981"),
+                                  annotation_bgcolor="rgba(15,23,42,0.85)", annotation_bordercolor="#10b981")
+                if rtarget:
+                    fig.add_hline(y=rtarget, line_dash="dash", line_color="rgba(148,163,184,0.3)", line_width=1,
+                                  annotation_text=f"Target: {rtarget:,}", annotation_position="top right",
+                                  annotation_font=dict(size=10, color=C["muted"]),
+                                  annotation_bgcolor="rgba(15,23,42,0.85)", yref="y2")
+
+                daily_df = daily_to_table_df(dates, counts, cum)
+
+                def render_daily_chart():
+                    st.plotly_chart(fig, use_container_width=True)
+
+                chart_table_section("daily", "Daily Registrations", daily_df, render_daily_chart)
+
+                if req_avg is not None and tsf_used is not None and dr_used is not None:
+                    if dr_used > 0:
+                        st.caption(f"Required: ({rtarget:,} − {tsf_used:,}) ÷ {dr_used} days = **{round(req_avg):,}**/day")
+                    else:
+                        st.caption(f"Period ended. Benchmark: **{round(req_avg):,}**/day")
+                if average_daily and span_days and (not days_from_sheet or days_from_sheet <= 1):
+                    st.caption(f"Daily avg = target ÷ {span_days} days = **{round(average_daily)}**/day")
+                elif has_start and has_end and days_from_sheet and days_from_sheet > 1:
+                    st.caption(f"Avg from sheet dates ({days_from_sheet} days): **{round(average_daily)}**/day")
+        else:
+            empty("📉", "No daily registration data for this event.")
+    else:
+        empty("📉", "Daily Registrations column not found.")
+
+
+@st.fragment
+def render_demographics(filtered_df: pd.DataFrame) -> None:
+    totals = _section_totals(filtered_df, (COL_GENDER, COL_OCCUPATION))
+    d1, d2 = st.columns(2)
+    with d1:
+        with st.container(border=True):
+            if COL_GENDER in filtered_df.columns:
+                merged = totals[COL_GENDER]
+                if merged:
+                    gender_df = distribution_to_table_df(merged)
+
+                    def render_gender_chart():
+                        fig_g = donut_figure(merged, ["#818cf8", "#f472b6", "#34d399", "#fbbf24", "#fb923c"])
+                        fig_g.update_layout(**plotly_layout(), height=320, showlegend=True,
+                                            legend=dict(font=dict(size=11, color=C["text2"])))
+                        fig_g.update_traces(textfont_color="#fff", hovertemplate="<b>%{label}</b><br>%{value:,} (%{percent})<extra></extra>")
+                        st.plotly_chart(fig_g, use_container_width=True)
+
+                    chart_table_section("gender", "Gender", gender_df, render_gender_chart)
+                else:
+                    empty("⚧", "No data")
+            else:
+                empty("⚧", "Column not found")
+    with d2:
+        with st.container(border=True):
+            if COL_OCCUPATION in filtered_df.columns:
+                merged = totals[COL_OCCUPATION]
+                if merged:
+                    occ_df = distribution_to_table_df(merged)
+
+                    def render_occupation_chart():
+                        fig_o = donut_figure(merged, ["#38bdf8", "#a78bfa", "#fb923c", "#4ade80", "#f87171", "#facc15"])
+                        fig_o.update_layout(**plotly_layout(), height=320, showlegend=True,
+                                            legend=dict(font=dict(size=11, color=C["text2"])))
+                        fig_o.update_traces(textfont_color="#fff", hovertemplate="<b>%{label}</b><br>%{value:,} (%{percent})<extra></extra>")
+                        st.plotly_chart(fig_o, use_container_width=True)
+
+                    chart_table_section("occupation", "Occupation", occ_df, render_occupation_chart)
+                else:
+                    empty("💼", "No data")
+            else:
+                empty("💼", "Column not found")
+
+
+@st.fragment
+def render_geography(filtered_df: pd.DataFrame) -> None:
+    totals = _section_totals(filtered_df, (COL_COUNTRY, COL_STATE, COL_CITY))
+    g1, g2 = st.columns(2)
+    with g1:
+        with st.container(border=True):
+            if COL_COUNTRY in filtered_df.columns:
+                merged = totals[COL_COUNTRY]
+                if merged:
+                    top = pd.Series(merged).nlargest(12)
+                    country_df = distribution_to_table_df(top.items())
+
+                    def render_country_chart():
+                        fig_c = go.Figure(go.Bar(x=top.values, y=top.index,
+                                                  orientation="h", marker=dict(color=top.values,
+                                                  colorscale=[[0, "#1e3a5f"], [1, "#818cf8"]], line_width=0, cornerradius=3),
+                                                  hovertemplate="<b>%{y}</b><br>%{x:,}<extra></extra>"))
+                        fig_c.update_layout(**plotly_layout(yaxis=dict(autorange="reversed")),
+                                            height=380, showlegend=False)
+                        st.plotly_chart(fig_c, use_container_width=True)
+
+                    chart_table_section("country", "Country", country_df, render_country_chart)
+                else:
+                    empty("🏳️", "No data")
+            else:
+                empty("🏳️", "Column not found")
+    with g2:
+        with st.container(border=True):
+            if COL_STATE in filtered_df.columns:
+                merged = totals[COL_STATE]
+                if merged:
+                    top = pd.Series(merged).nlargest(12)
+                    state_df = distribution_to_table_df(top.items())
+
+                    def render_state_chart():
+                        fig_s = go.Figure(go.Bar(x=top.values, y=top.index,
+                                                  orientation="h", marker=dict(color=top.values,
+                                                  colorscale=[[0, "#134e4a"], [1, "#34d399"]], line_width=0, cornerradius=3),
+                                                  hovertemplate="<b>%{y}</b><br>%{x:,}<extra></extra>"))
+                        fig_s.update_layout(**plotly_layout(yaxis=dict(autorange="reversed")),
+                                            height=380, showlegend=False)
+                        st.plotly_chart(fig_s, use_container_width=True)
+
+                    chart_table_section("state", "State", state_df, render_state_chart)
+                else:
+                    empty("📍", "No data")
+            else:
+                empty("📍", "Column not found")
+
+    with st.container(border=True):
+        if COL_CITY in filtered_df.columns:
+            merged = totals[COL_CITY]
+            if merged:
+                top = pd.Series(merged).nlargest(15)
+                city_df = distribution_to_table_df(top.items())
+
+                def render_city_chart():
+                    fig_ci = go.Figure(go.Bar(x=top.values, y=top.index,
+                                              orientation="h", marker=dict(color=top.values,
+                                              colorscale=[[0, "#312e81"], [1, "#a78bfa"]], line_width=0, cornerradius=3),
+                                              hovertemplate="<b>%{y}</b><br>%{x:,}<extra></extra>"))
+                    fig_ci.update_layout(**plotly_layout(yaxis=dict(autorange="reversed")),
+                                         height=420, showlegend=False)
+                    st.plotly_chart(fig_ci, use_container_width=True)
+
+                chart_table_section("city", "City", city_df, render_city_chart)
+            else:
+                empty("🏙️", "No data")
+        else:
+            empty("🏙️", "Column not found")
+
+
+@st.fragment
+def _event_selector(initiative_options: list) -> None:
+    """
+    Sidebar pin manager + event picker. Pin edits rerun only this fragment; a changed
+    selection is written to session state and reruns the whole app.
+    """
+    # One multiselect + one radio instead of two buttons per event.
+    # Pins are edited first so the radio below already reflects the change.
+    with st.expander(f"Pinned events ({len(st.session_state.pinned_initiatives)})", expanded=False):
+        new_pins = st.multiselect("Pinned", initiative_options,
+                                  default=st.session_state.pinned_initiatives,
+                                  label_visibility="collapsed")
+        if new_pins != st.session_state.pinned_initiatives:
+            st.session_state.pinned_initiatives = new_pins
+            save_pinned_in_background(new_pins)
+
+    pinned_set = set(st.session_state.pinned_initiatives)
+    ordered = ([x for x in initiative_options if x in pinned_set]
+               + [x for x in initiative_options if x not in pinned_set])
+
+    if st.session_state.get("evt_radio") not in ordered:
+        st.session_state.pop("evt_radio", None)
+        if st.session_state.selected_initiatives:
+            st.session_state.evt_radio = st.session_state.selected_initiatives[0]
+    choice = st.radio(
+        "Event",
+        ordered,
+        index=None,
+        key="evt_radio",
+        format_func=lambda x: f"📌 {x}" if x in pinned_set else x,
+        label_visibility="collapsed",
+    )
+    selection = [choice] if choice else []
+    if selection != st.session_state.selected_initiatives:
+        st.session_state.selected_initiatives = selection
+        st.rerun()
+
+
 # ---------------------------------------------------------------------------
 # Main Dashboard
 # ---------------------------------------------------------------------------
@@ -877,43 +1273,10 @@ def main():
                 initiative_options = []
                 selected_initiatives = []
             else:
-                initiative_options = sorted(df[col_name].dropna().unique().tolist())
+                initiative_options = _initiative_options(df)
                 st.session_state.selected_initiatives = [x for x in st.session_state.selected_initiatives if x in initiative_options]
                 st.session_state.pinned_initiatives = [x for x in st.session_state.pinned_initiatives if x in initiative_options]
-                pinned = [x for x in initiative_options if x in st.session_state.pinned_initiatives]
-                other = [x for x in initiative_options if x not in st.session_state.pinned_initiatives]
-                selected_initiatives = st.session_state.selected_initiatives
-
-                if pinned:
-                    for i, opt in enumerate(pinned):
-                        is_sel = opt in selected_initiatives
-                        c1, c2 = st.columns([5, 1])
-                        with c1:
-                            if st.button(f"{'● ' if is_sel else ''}{opt}", key=f"p_{i}",
-                                         use_container_width=True, type="primary" if is_sel else "secondary"):
-                                st.session_state.selected_initiatives = [] if is_sel else [opt]
-                                st.rerun()
-                        with c2:
-                            if st.button("✕", key=f"pu_{i}", help="Unpin"):
-                                st.session_state.pinned_initiatives.remove(opt)
-                                save_pinned_to_file(st.session_state.pinned_initiatives)
-                                st.rerun()
-
-                with st.expander(f"All events ({len(other)})", expanded=not pinned):
-                    for i, opt in enumerate(other):
-                        is_sel = opt in selected_initiatives
-                        c1, c2 = st.columns([5, 1])
-                        with c1:
-                            if st.button(f"{'● ' if is_sel else ''}{opt}", key=f"o_{i}",
-                                         use_container_width=True, type="primary" if is_sel else "secondary"):
-                                st.session_state.selected_initiatives = [] if is_sel else [opt]
-                                st.rerun()
-                        with c2:
-                            if st.button("📌", key=f"op_{i}", help="Pin"):
-                                if opt not in st.session_state.pinned_initiatives:
-                                    st.session_state.pinned_initiatives.append(opt)
-                                    save_pinned_to_file(st.session_state.pinned_initiatives)
-                                st.rerun()
+                _event_selector(initiative_options)
                 selected_initiatives = st.session_state.selected_initiatives
 
         if can_edit_sheet(role):
@@ -934,16 +1297,19 @@ def main():
         empty("👈", "Select an event from the sidebar to view analytics.")
         return
 
-    filtered_df = df[df["Initiative Name"].isin(selected_initiatives)].copy()
+    filtered_df = df.iloc[_initiative_rows(df, selected_name)]
 
     # Event header
     event_config = get_event_config(load_event_dashboard_config(), selected_name)
     if event_config["dashboard_link"]:
-        st.markdown(f'<a href="{event_config["dashboard_link"]}" target="_blank" class="dash-link">Open dashboard ↗</a>', unsafe_allow_html=True)
-        st.markdown("<div style='height:0.3rem'></div>", unsafe_allow_html=True)
+        st.markdown(
+            f'<a href="{event_config["dashboard_link"]}" target="_blank" class="dash-link">Open dashboard ↗</a>'
+            "<div style='height:0.3rem'></div>",
+            unsafe_allow_html=True,
+        )
 
     # KPIs
-    kpis = aggregate_numeric_columns(filtered_df, NUMERIC_KPI_COLUMNS)
+    kpis = _initiative_kpis(df, selected_name)
     reg_count = kpis.get("Registration Count", 0)
     sub_count = kpis.get("Submission Count", 0)
     teams_count = kpis.get("Teams Count", 0)
@@ -967,256 +1333,15 @@ def main():
             st.caption("Not configured. Set up in Settings.")
 
     # ── Registration Trend ───────────────────────────────────────────────
-    sec_label("Registration Trend")
-    if COL_DAILY_REG in filtered_df.columns:
-        combined_daily = parse_daily_registrations(filtered_df[COL_DAILY_REG])
-        dates, counts = daily_registrations_to_line_data(combined_daily)
-        if dates and counts:
-            with st.container(border=True):
-                REG_START_COL, REG_END_COL = "Registration Start Date", "Registration End Date"
-                average_daily = None
-                days_from_sheet = None
-                span_days = None
-                end_dt = None
-                event_cfg = get_event_config(load_event_dashboard_config(), selected_name)
-                rtarget = event_cfg.get("registration_target") or 0
-                has_start = REG_START_COL in filtered_df.columns
-                has_end = REG_END_COL in filtered_df.columns
-                if has_start and has_end:
-                    start_col, end_col = REG_START_COL, REG_END_COL
-                else:
-                    end_col = _find_column(filtered_df, "registration", "end") if not has_end else REG_END_COL
-                    start_col = _find_column(filtered_df, "registration", "start") if not has_start else REG_START_COL
-                    if not start_col:
-                        start_col = "Created At" if "Created At" in filtered_df.columns else None
-                    if not end_col or end_col not in filtered_df.columns:
-                        end_col = None
-                    if not start_col or start_col not in filtered_df.columns:
-                        start_col = None
-                if rtarget and end_col and start_col:
-                    row = filtered_df.iloc[0]
-                    sv, ev = row.get(start_col), row.get(end_col)
-                    if pd.notna(sv) and pd.notna(ev):
-                        sdt = pd.to_datetime(sv, errors="coerce", dayfirst=True)
-                        edt = pd.to_datetime(ev, errors="coerce", dayfirst=True)
-                        if hasattr(sdt, "normalize"): sdt = sdt.normalize()
-                        if hasattr(edt, "normalize"): edt = edt.normalize()
-                        end_dt = edt
-                        if pd.notna(sdt) and pd.notna(edt):
-                            days_from_sheet = max(1, (edt - sdt).days + 1)
-                            if days_from_sheet > 1:
-                                average_daily = rtarget / days_from_sheet
-                if rtarget and dates:
-                    try:
-                        mn, mx = pd.to_datetime(min(dates), errors="coerce"), pd.to_datetime(max(dates), errors="coerce")
-                        if pd.notna(mn) and pd.notna(mx):
-                            span_days = max(1, (mx - mn).days + 1)
-                            if average_daily is None or (days_from_sheet and days_from_sheet <= 1):
-                                average_daily = rtarget / span_days
-                    except Exception:
-                        pass
-
-                req_avg = None
-                tsf_used = None
-                dr_used = None
-                if rtarget and dates and counts and end_dt is not None:
-                    ets = end_dt.normalize() if hasattr(end_dt, "normalize") else end_dt
-                    mask = []
-                    for d in dates:
-                        dt = pd.to_datetime(d, errors="coerce")
-                        if pd.notna(dt) and hasattr(dt, "normalize"): dt = dt.normalize()
-                        mask.append(pd.notna(dt) and dt <= ets)
-                    if any(mask):
-                        tsf = sum(c for c, m in zip(counts, mask) if m)
-                        dr_dates = [d for d, m in zip(dates, mask) if m]
-                        ld = pd.to_datetime(max(dr_dates), errors="coerce")
-                        if pd.notna(ld) and hasattr(ld, "normalize"): ld = ld.normalize()
-                        dr = (ets - ld).days
-                        if dr > 0:
-                            req_avg = max(0, rtarget - tsf) / dr
-                            tsf_used, dr_used = tsf, dr
-                        elif average_daily is not None:
-                            req_avg = average_daily
-                            tsf_used, dr_used = tsf, 0
-
-                bar_colors = ["#10b981" if c >= average_daily else "#ef4444" for c in counts] if average_daily else ["#818cf8"] * len(counts)
-                cum = []
-                r = 0
-                for c in counts:
-                    r += c
-                    cum.append(r)
-
-                fig = go.Figure()
-                fig.add_trace(go.Bar(x=dates, y=counts, marker_color=bar_colors, marker_line_width=0,
-                                     name="Daily", opacity=0.75,
-                                     hovertemplate="<b>%{x}</b><br>Daily: %{y:,}<extra></extra>"))
-                fig.add_trace(go.Scatter(x=dates, y=cum, mode="lines+markers",
-                                         line=dict(color="#818cf8", width=2.5), marker=dict(size=4, color="#818cf8"),
-                                         name="Cumulative", yaxis="y2",
-                                         hovertemplate="<b>%{x}</b><br>Cumulative: %{y:,}<extra></extra>"))
-                fig.update_layout(
-                    **plotly_layout(), height=400, hovermode="x unified", showlegend=True, bargap=0.15,
-                    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1,
-                                font=dict(size=11, color=C["text2"]), bgcolor="rgba(0,0,0,0)"),
-                    xaxis_title="Date", yaxis_title="Daily",
-                    yaxis2=dict(title="Cumulative", overlaying="y", side="right", showgrid=False,
-                                title_font=dict(size=12, color="#818cf8"), tickfont=dict(size=11, color="#818cf8")),
-                )
-                if average_daily:
-                    fig.add_hline(y=average_daily, line_dash="dash", line_color="#f59e0b", line_width=1.5,
-                                  annotation_text=f"Avg: {round(average_daily):,}", annotation_position="bottom left",
-                                  annotation_font=dict(size=10, color="#f59e0b"),
-                                  annotation_bgcolor="rgba(15,23,42,0.85)", annotation_bordercolor="#f59e0b")
-                if req_avg is not None:
-                    lbl = f"Req: {round(req_avg):,}" if dr_used and dr_used > 0 else f"Period avg: {round(req_avg):,}"
-                    fig.add_hline(y=req_avg, line_dash="dot", line_color="#10b981", line_width=1.5,
-                                  annotation_text=lbl, annotation_position="top left",
-                                  annotation_font=dict(size=10, color="#10b981"),
-                                  annotation_bgcolor="rgba(15,23,42,0.85)", annotation_bordercolor="#10b981")
-                if rtarget:
-                    fig.add_hline(y=rtarget, line_dash="dash", line_color="rgba(148,163,184,0.3)", line_width=1,
-                                  annotation_text=f"Target: {rtarget:,}", annotation_position="top right",
-                                  annotation_font=dict(size=10, color=C["muted"]),
-                                  annotation_bgcolor="rgba(15,23,42,0.85)", yref="y2")
-
-                daily_df = daily_to_table_df(dates, counts, cum)
-
-                def render_daily_chart():
-                    st.plotly_chart(fig, use_container_width=True)
-
-                chart_table_section("daily", "Daily Registrations", daily_df, render_daily_chart)
-
-                if req_avg is not None and tsf_used is not None and dr_used is not None:
-                    if dr_used > 0:
-                        st.caption(f"Required: ({rtarget:,} − {tsf_used:,}) ÷ {dr_used} days = **{round(req_avg):,}**/day")
-                    else:
-                        st.caption(f"Period ended. Benchmark: **{round(req_avg):,}**/day")
-                if average_daily and span_days and (not days_from_sheet or days_from_sheet <= 1):
-                    st.caption(f"Daily avg = target ÷ {span_days} days = **{round(average_daily)}**/day")
-                elif has_start and has_end and days_from_sheet and days_from_sheet > 1:
-                    st.caption(f"Avg from sheet dates ({days_from_sheet} days): **{round(average_daily)}**/day")
-        else:
-            empty("📉", "No daily registration data for this event.")
-    else:
-        empty("📉", "Daily Registrations column not found.")
+    render_daily(filtered_df, reg_target)
 
     # ── Demographics & Geography (tabs) ──────────────────────────────────
     sec_label("Breakdown")
     tab_demo, tab_geo = st.tabs(["Demographics", "Geography"])
-
     with tab_demo:
-        d1, d2 = st.columns(2)
-        with d1:
-            with st.container(border=True):
-                if COL_GENDER in filtered_df.columns:
-                    merged = merge_json_dicts([safe_json_loads(v) for v in filtered_df[COL_GENDER]])
-                    if merged:
-                        gender_df = distribution_to_table_df(merged)
-
-                        def render_gender_chart():
-                            fig_g = px.pie(values=list(merged.values()),
-                                           names=[normalize_chart_label(k) for k in merged],
-                                           hole=0.5, color_discrete_sequence=["#818cf8", "#f472b6", "#34d399", "#fbbf24", "#fb923c"])
-                            fig_g.update_layout(**plotly_layout(), height=320, showlegend=True,
-                                                legend=dict(font=dict(size=11, color=C["text2"])))
-                            fig_g.update_traces(textfont_color="#fff", hovertemplate="<b>%{label}</b><br>%{value:,} (%{percent})<extra></extra>")
-                            st.plotly_chart(fig_g, use_container_width=True)
-
-                        chart_table_section("gender", "Gender", gender_df, render_gender_chart)
-                    else:
-                        empty("⚧", "No data")
-                else:
-                    empty("⚧", "Column not found")
-        with d2:
-            with st.container(border=True):
-                if COL_OCCUPATION in filtered_df.columns:
-                    merged = merge_json_dicts([safe_json_loads(v) for v in filtered_df[COL_OCCUPATION]])
-                    if merged:
-                        occ_df = distribution_to_table_df(merged)
-
-                        def render_occupation_chart():
-                            fig_o = px.pie(values=list(merged.values()),
-                                           names=[normalize_chart_label(k) for k in merged],
-                                           hole=0.5, color_discrete_sequence=["#38bdf8", "#a78bfa", "#fb923c", "#4ade80", "#f87171", "#facc15"])
-                            fig_o.update_layout(**plotly_layout(), height=320, showlegend=True,
-                                                legend=dict(font=dict(size=11, color=C["text2"])))
-                            fig_o.update_traces(textfont_color="#fff", hovertemplate="<b>%{label}</b><br>%{value:,} (%{percent})<extra></extra>")
-                            st.plotly_chart(fig_o, use_container_width=True)
-
-                        chart_table_section("occupation", "Occupation", occ_df, render_occupation_chart)
-                    else:
-                        empty("💼", "No data")
-                else:
-                    empty("💼", "Column not found")
-
+        render_demographics(filtered_df)
     with tab_geo:
-        g1, g2 = st.columns(2)
-        with g1:
-            with st.container(border=True):
-                if COL_COUNTRY in filtered_df.columns:
-                    merged = merge_json_dicts([safe_json_loads(v) for v in filtered_df[COL_COUNTRY]])
-                    if merged:
-                        items = sorted(merged.items(), key=lambda x: -x[1])[:12]
-                        country_df = distribution_to_table_df(items)
-
-                        def render_country_chart():
-                            fig_c = go.Figure(go.Bar(x=[v for _, v in items], y=[normalize_chart_label(k) for k, _ in items],
-                                                      orientation="h", marker=dict(color=[v for _, v in items],
-                                                      colorscale=[[0, "#1e3a5f"], [1, "#818cf8"]], line_width=0, cornerradius=3),
-                                                      hovertemplate="<b>%{y}</b><br>%{x:,}<extra></extra>"))
-                            fig_c.update_layout(**plotly_layout(yaxis=dict(autorange="reversed")),
-                                                height=380, showlegend=False)
-                            st.plotly_chart(fig_c, use_container_width=True)
-
-                        chart_table_section("country", "Country", country_df, render_country_chart)
-                    else:
-                        empty("🏳️", "No data")
-                else:
-                    empty("🏳️", "Column not found")
-        with g2:
-            with st.container(border=True):
-                if COL_STATE in filtered_df.columns:
-                    merged = merge_json_dicts([safe_json_loads(v) for v in filtered_df[COL_STATE]])
-                    if merged:
-                        items = sorted(merged.items(), key=lambda x: -x[1])[:12]
-                        state_df = distribution_to_table_df(items)
-
-                        def render_state_chart():
-                            fig_s = go.Figure(go.Bar(x=[v for _, v in items], y=[normalize_chart_label(k) for k, _ in items],
-                                                      orientation="h", marker=dict(color=[v for _, v in items],
-                                                      colorscale=[[0, "#134e4a"], [1, "#34d399"]], line_width=0, cornerradius=3),
-                                                      hovertemplate="<b>%{y}</b><br>%{x:,}<extra></extra>"))
-                            fig_s.update_layout(**plotly_layout(yaxis=dict(autorange="reversed")),
-                                                height=380, showlegend=False)
-                            st.plotly_chart(fig_s, use_container_width=True)
-
-                        chart_table_section("state", "State", state_df, render_state_chart)
-                    else:
-                        empty("📍", "No data")
-                else:
-                    empty("📍", "Column not found")
-
-        with st.container(border=True):
-            if COL_CITY in filtered_df.columns:
-                merged = merge_json_dicts([safe_json_loads(v) for v in filtered_df[COL_CITY]])
-                if merged:
-                    items = sorted(merged.items(), key=lambda x: -x[1])[:15]
-                    city_df = distribution_to_table_df(items)
-
-                    def render_city_chart():
-                        fig_ci = go.Figure(go.Bar(x=[v for _, v in items], y=[normalize_chart_label(k) for k, _ in items],
-                                                  orientation="h", marker=dict(color=[v for _, v in items],
-                                                  colorscale=[[0, "#312e81"], [1, "#a78bfa"]], line_width=0, cornerradius=3),
-                                                  hovertemplate="<b>%{y}</b><br>%{x:,}<extra></extra>"))
-                        fig_ci.update_layout(**plotly_layout(yaxis=dict(autorange="reversed")),
-                                             height=420, showlegend=False)
-                        st.plotly_chart(fig_ci, use_container_width=True)
-
-                    chart_table_section("city", "City", city_df, render_city_chart)
-                else:
-                    empty("🏙️", "No data")
-            else:
-                empty("🏙️", "Column not found")
+        render_geography(filtered_df)
 
 
 if __name__ == "__main__":
@@ -4,11 +4,15 @@ Users are persisted in users.json. Passwords are hashed with SHA-256 + salt.
 """
 
 import hashlib
+import hmac
 import json
 import logging
 import os
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 
+from utils import write_json_atomic
+
 logger = logging.getLogger(__name__)
 
 AUTH_SALT = "event-dashboard-rbac-2024"
@@ -34,8 +38,13 @@ _SEED_USERS = {
 }
 
 
+_AUTH_SALT_BYTES = AUTH_SALT.encode()
+
+
 def _hash_password(password: str) -> str:
-    return hashlib.sha256((AUTH_SALT + password).encode()).hexdigest()
+    h = hashlib.sha256(_AUTH_SALT_BYTES)
+    h.update(password.encode())
+    return h.hexdigest()
 
 
 def get_password_hash(password: str) -> str:
@@ -68,8 +77,7 @@ def load_users() -> Dict:
 
 def save_users(users: Dict) -> None:
     try:
-        with open(USERS_FILE, "w", encoding="utf-8") as fh:
-            json.dump(users, fh, indent=2, ensure_ascii=False)
+        write_json_atomic(USERS_FILE, users, separators=(",", ":"), ensure_ascii=False)
     except OSError as exc:
         logger.error("Could not write %s: %s", USERS_FILE, exc)
 
@@ -86,7 +94,7 @@ def verify_login(username: str, password: str) -> Tuple[bool, Optional[str]]:
     if username not in users:
         return False, None
     entry = users[username]
-    if entry["password_hash"] != _hash_password(password):
+    if not hmac.compare_digest(entry["password_hash"], _hash_password(password)):
         return False, None
     return True, entry["role"]
 
@@ -104,6 +112,7 @@ def has_permission(role: str, permission: str) -> bool:
     return permission in perms
 
 
+@lru_cache(maxsize=8)
 def can_edit_sheet(role: str) -> bool:
     return has_permission(role, "edit_sheet") or has_permission(role, "connect")
 
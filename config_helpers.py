@@ -6,8 +6,11 @@ Used by app.py and pages/1_Event_Settings.py.
 import json
 import os
 import logging
+from functools import lru_cache
 from typing import Any, Dict
 
+from utils import fast_json_loads, write_json_atomic
+
 logger = logging.getLogger(__name__)
 
 # Default sheet and credentials (shared with main app)
@@ -17,27 +20,31 @@ DEFAULT_SHEET_URL = "https://docs.google.com/spreadsheets/d/1LDJWBy2g1gtQK_u1vww
 EVENT_DASHBOARD_CONFIG_FILE = "event_dashboard_config.json"
 
 
+@lru_cache(maxsize=4)
+def _load_config_cached(mtime_ns: int, size: int) -> Dict[str, Dict[str, Any]]:
+    with open(EVENT_DASHBOARD_CONFIG_FILE, "rb") as f:
+        data = fast_json_loads(f.read())
+    return data if isinstance(data, dict) else {}
+
+
 def load_event_dashboard_config() -> Dict[str, Dict[str, Any]]:
     """
     Load event dashboard config from JSON file.
     Returns dict: initiative_name -> {dashboard_link, admin_username, admin_password, registration_target (optional)}
+    The file is re-parsed only when its mtime/size change; callers get their own copy to mutate.
     """
     try:
-        if os.path.isfile(EVENT_DASHBOARD_CONFIG_FILE):
-            with open(EVENT_DASHBOARD_CONFIG_FILE, encoding="utf-8") as f:
-                data = json.load(f)
-                if isinstance(data, dict):
-                    return data
+        st = os.stat(EVENT_DASHBOARD_CONFIG_FILE)
+        data = _load_config_cached(st.st_mtime_ns, st.st_size)
     except (json.JSONDecodeError, OSError):
-        pass
-    return {}
+        return {}
+    return {k: dict(v) if isinstance(v, dict) else v for k, v in data.items()}
 
 
 def save_event_dashboard_config(config: Dict[str, Dict[str, Any]]) -> None:
     """Write event dashboard config to JSON file."""
     try:
-        with open(EVENT_DASHBOARD_CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=2)
+        write_json_atomic(EVENT_DASHBOARD_CONFIG_FILE, config, separators=(",", ":"))
     except OSError as e:
         logger.warning("Could not save event dashboard config: %s", e)
 
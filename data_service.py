@@ -7,17 +7,16 @@ import logging
 import time
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
-from sheets_connector import load_sheet_data
+from sheets_connector import credentials_mtime, load_sheet_data
 from config_helpers import get_event_config, load_event_dashboard_config
 from utils import (
     extract_sheet_id,
-    safe_json_loads,
-    merge_json_dicts,
-    normalize_chart_label,
-    parse_daily_registrations,
-    daily_registrations_to_line_data,
+    find_column,
+    aggregate_all_json,
+    daily_registrations_line_data,
     aggregate_numeric_columns,
     COL_DAILY_REG,
     COL_GENDER,
@@ -39,7 +38,7 @@ CACHE_TTL = 300  # 5 minutes
 
 
 def cached_load_sheet(sheet_id: str, credentials_path: str) -> Optional[pd.DataFrame]:
-    key = f"{sheet_id}::{credentials_path}"
+    key = f"{sheet_id}::{credentials_path}::{credentials_mtime(credentials_path)}"
     now = time.time()
     if key in _cache:
         ts, df = _cache[key]
@@ -70,26 +69,13 @@ def get_event_list(df: Optional[pd.DataFrame]) -> List[str]:
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
-def _find_column(df: pd.DataFrame, *keywords: str) -> Optional[str]:
-    if df is None or df.columns is None:
-        return None
-    lower_kw = [k.lower() for k in keywords]
-    for c in df.columns:
-        if all(k in str(c).strip().lower() for k in lower_kw):
-            return c
-    return None
-
-
-def _parse_distribution(df: pd.DataFrame, col: str, top_n: int = 12) -> List[Dict]:
-    """Parse a JSON distribution column into sorted [{label, value}] list."""
-    if col not in df.columns:
-        return []
-    dicts = [safe_json_loads(v) for v in df[col]]
-    merged = merge_json_dicts(dicts)
+def _parse_distribution(totals: Dict[str, Dict[str, int]], col: str, top_n: int = 12) -> List[Dict]:
+    """Turn one column of aggregate_all_json output into a sorted [{label, value}] list."""
+    merged = totals.get(col)
     if not merged:
         return []
-    items = sorted(merged.items(), key=lambda x: -x[1])[:top_n]
-    return [{"label": normalize_chart_label(k), "value": v} for k, v in items]
+    top = pd.Series(merged).nlargest(top_n)
+    return [{"label": k, "value": int(v)} for k, v in top.items()]
 
 
 # ---------------------------------------------------------------------------
@@ -111,17 +97,21 @@ def get_event_analytics(df: pd.DataFrame, event_name: str) -> Dict[str, Any]:
     # Daily registrations
     daily = _build_daily_registrations(filtered, event_name, reg_target)
 
+    # All JSON distribution columns in one pass
+    totals = aggregate_all_json(filtered, [COL_GENDER, COL_OCCUPATION, COL_COUNTRY,
+                                           COL_STATE, COL_CITY, COL_CITY_STAT])
+
     # Demographics
-    gender = _parse_distribution(filtered, COL_GENDER)
-    occupation = _parse_distribution(filtered, COL_OCCUPATION)
+    gender = _parse_distribution(totals, COL_GENDER)
+    occupation = _parse_distribution(totals, COL_OCCUPATION)
 
     # Geography
-    country = _parse_distribution(filtered, COL_COUNTRY, top_n=12)
-    state = _parse_distribution(filtered, COL_STATE, top_n=12)
-    city = _parse_distribution(filtered, COL_CITY, top_n=15)
+    country = _parse_distribution(totals, COL_COUNTRY, top_n=12)
+    state = _parse_distribution(totals, COL_STATE, top_n=12)
+    city = _parse_distribution(totals, COL_CITY, top_n=15)
 
     # City Stat
-    city_stat = _parse_distribution(filtered, COL_CITY_STAT, top_n=15)
+    city_stat = _parse_distribution(totals, COL_CITY_STAT, top_n=15)
 
     return {
         "event_name": event_name,
@@ -148,8 +138,7 @@ def _build_daily_registrations(filtered: pd.DataFrame, event_name: str, reg_targ
     if COL_DAILY_REG not in filtered.columns:
         return {"dates": [], "counts": [], "cumulative": [], "bar_colors": []}
 
-    combined = parse_daily_registrations(filtered[COL_DAILY_REG])
-    dates, counts = daily_registrations_to_line_data(combined)
+    dates, counts = daily_registrations_line_data(filtered[COL_DAILY_REG])
     if not dates:
         return {"dates": [], "counts": [], "cumulative": [], "bar_colors": []}
 
@@ -170,8 +159,8 @@ def _build_daily_registrations(filtered: pd.DataFrame, event_name: str, reg_targ
     has_start = REG_START_COL in filtered.columns
     has_end = REG_END_COL in filtered.columns
 
-    start_col = REG_START_COL if has_start else _find_column(filtered, "registration", "start")
-    end_col = REG_END_COL if has_end else _find_column(filtered, "registration", "end")
+    start_col = REG_START_COL if has_start else find_column(filtered, "registration", "start")
+    end_col = REG_END_COL if has_end else find_column(filtered, "registration", "end")
     if not start_col:
         start_col = "Created At" if "Created At" in filtered.columns else None
     if start_col and start_col not in filtered.columns:
@@ -233,7 +222,7 @@ def _build_daily_registrations(filtered: pd.DataFrame, event_name: str, reg_targ
 
     # Bar colors
     if average_daily:
-        bar_colors = ["#10b981" if c >= average_daily else "#ef4444" for c in counts]
+        bar_colors = np.where(np.asarray(counts) >= average_daily, "#10b981", "#ef4444").tolist()
     else:
         bar_colors = ["#818cf8"] * len(counts)
 
@@ -12,9 +12,15 @@ from config_helpers import (
     save_event_dashboard_config,
     get_event_config,
 )
-from sheets_connector import load_sheet_data
+from sheets_connector import credentials_mtime, load_sheet_data
 from utils import extract_sheet_id
 
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_load_sheet(sheet_id: str, credentials_path: str, creds_mtime: int):
+    return load_sheet_data(sheet_id, credentials_path)
+
+
 _FAVICON = Path(__file__).resolve().parent.parent / "static" / "favicon.png"
 _PAGE_ICON = str(_FAVICON) if _FAVICON.is_file() else "⚙️"
 st.set_page_config(page_title="Event Settings", page_icon=_PAGE_ICON, layout="wide")
@@ -84,7 +90,8 @@ if df is None or df.empty:
         sheet_id = extract_sheet_id(DEFAULT_SHEET_URL)
         if sheet_id:
             with st.spinner("Loading..."):
-                df_loaded = load_sheet_data(sheet_id, DEFAULT_CREDENTIALS_PATH)
+                df_loaded = _cached_load_sheet(sheet_id, DEFAULT_CREDENTIALS_PATH,
+                                               credentials_mtime(DEFAULT_CREDENTIALS_PATH))
             if df_loaded is not None and not df_loaded.empty:
                 st.session_state.df_raw = df_loaded
                 st.rerun()
@@ -110,27 +117,28 @@ for i, initiative_name in enumerate(initiative_options):
     st.markdown(f'<div class="settings-card"><h3>{initiative_name}</h3>', unsafe_allow_html=True)
 
     if is_editing:
-        link = st.text_input("Dashboard link", value=entry["dashboard_link"], key=f"link_{safe_key}", placeholder="https://...")
-        username = st.text_input("Admin username", value=entry["admin_username"], key=f"user_{safe_key}")
-        password = st.text_input("Admin password", value=entry["admin_password"], type="password", key=f"pass_{safe_key}")
-        reg_target = entry.get("registration_target") or 0
-        registration_target = st.number_input("Registration target", min_value=0, value=int(reg_target) if reg_target else 0, key=f"regtarget_{safe_key}")
-        c1, c2, _ = st.columns([1, 1, 3])
-        with c1:
-            if st.button("Save", key=f"save_{safe_key}", type="primary", use_container_width=True):
-                config[initiative_name] = {
-                    "dashboard_link": (link or "").strip(),
-                    "admin_username": (username or "").strip(),
-                    "admin_password": password or "",
-                    "registration_target": registration_target,
-                }
-                save_event_dashboard_config(config)
-                st.session_state.editing_event = None
-                st.rerun()
-        with c2:
-            if st.button("Cancel", key=f"cancel_{safe_key}", use_container_width=True):
-                st.session_state.editing_event = None
-                st.rerun()
+        with st.form(f"edit_{safe_key}", border=False):
+            link = st.text_input("Dashboard link", value=entry["dashboard_link"], placeholder="https://...")
+            username = st.text_input("Admin username", value=entry["admin_username"])
+            password = st.text_input("Admin password", value=entry["admin_password"], type="password")
+            reg_target = entry.get("registration_target") or 0
+            registration_target = st.number_input("Registration target", min_value=0, value=int(reg_target) if reg_target else 0)
+            c1, c2, _ = st.columns([1, 1, 3])
+            with c1:
+                saved = st.form_submit_button("Save", type="primary", use_container_width=True)
+            with c2:
+                cancelled = st.form_submit_button("Cancel", use_container_width=True)
+        if saved:
+            config[initiative_name] = {
+                "dashboard_link": (link or "").strip(),
+                "admin_username": (username or "").strip(),
+                "admin_password": password or "",
+                "registration_target": registration_target,
+            }
+            save_event_dashboard_config(config)
+        if saved or cancelled:
+            st.session_state.editing_event = None
+            st.rerun()
     else:
         has_link = bool(entry["dashboard_link"])
         has_user = bool(entry["admin_username"])
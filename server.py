@@ -40,7 +40,7 @@ from config_helpers import (
     get_event_config,
 )
 from data_service import cached_load_sheet, get_event_list, get_event_analytics
-from utils import extract_sheet_id
+from utils import extract_sheet_id, write_json_atomic
 
 logging.basicConfig(
     level=logging.INFO,
@@ -123,21 +123,29 @@ def _user_info():
     return name, role, is_admin
 
 
+_pinned_cache = {"mtime_ns": None, "pinned": []}
+
+
 def _load_pinned():
+    """Pinned list, re-parsed only when the file's mtime changes. Returns a fresh list each call."""
     try:
-        if os.path.isfile(PINNED_FILE):
+        mtime_ns = os.stat(PINNED_FILE).st_mtime_ns
+    except OSError:
+        return []
+    if _pinned_cache["mtime_ns"] != mtime_ns:
+        try:
             with open(PINNED_FILE, encoding="utf-8") as fh:
                 data = json.load(fh)
-                return data.get("pinned", []) if isinstance(data, dict) else []
-    except (json.JSONDecodeError, OSError):
-        pass
-    return []
+        except (json.JSONDecodeError, OSError):
+            return []
+        _pinned_cache["pinned"] = data.get("pinned", []) if isinstance(data, dict) else []
+        _pinned_cache["mtime_ns"] = mtime_ns
+    return list(_pinned_cache["pinned"])
 
 
 def _save_pinned(pinned_list):
     try:
-        with open(PINNED_FILE, "w", encoding="utf-8") as fh:
-            json.dump({"pinned": list(pinned_list)}, fh, indent=2)
+        write_json_atomic(PINNED_FILE, {"pinned": list(pinned_list)}, separators=(",", ":"))
     except OSError as e:
         logger.warning("Could not save pinned initiatives: %s", e)
 
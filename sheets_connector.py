@@ -4,11 +4,16 @@ Uses gspread with service account authentication.
 """
 
 import logging
+import os
+from functools import lru_cache
+
 import pandas as pd
 import gspread
 from google.oauth2.service_account import Credentials
 from typing import Optional
 
+from utils import NUMERIC_KPI_COLUMNS
+
 logger = logging.getLogger(__name__)
 
 # Expected column names
@@ -33,6 +38,8 @@ EXPECTED_COLUMNS = [
     "City Stats",
 ]
 
+CATEGORICAL_COLUMNS = ["Initiative Name", "Created By"]
+
 
 def get_credentials(credentials_path: str = "credentials.json"):
     """Load Google service account credentials from JSON file."""
@@ -46,6 +53,29 @@ def get_credentials(credentials_path: str = "credentials.json"):
     return creds
 
 
+def credentials_mtime(credentials_path: str) -> int:
+    """mtime (ns) of the credentials file, or 0 if missing. Used in cache keys so rotated creds bust them."""
+    try:
+        return os.stat(credentials_path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+@lru_cache(maxsize=4)
+def _authorized_client(credentials_path: str, mtime_ns: int) -> gspread.Client:
+    logger.info("Authorizing gspread client...")
+    return gspread.authorize(get_credentials(credentials_path))
+
+
+def get_client(credentials_path: str = "credentials.json") -> gspread.Client:
+    """
+    Return an authorized gspread client, reused across sheet reloads so a cache refresh
+    only repeats the fetch, not the OAuth exchange. Keyed on the file's mtime so rotated
+    credentials get a fresh client.
+    """
+    return _authorized_client(credentials_path, os.stat(credentials_path).st_mtime_ns)
+
+
 def load_sheet_data(sheet_id: str, credentials_path: str = "credentials.json") -> Optional[pd.DataFrame]:
     """
     Connect to Google Sheet by ID and load first worksheet into a DataFrame.
@@ -53,18 +83,17 @@ def load_sheet_data(sheet_id: str, credentials_path: str = "credentials.json") -
     """
     logger.info("Loading sheet: sheet_id=%s, credentials_path=%s", sheet_id, credentials_path)
     try:
-        creds = get_credentials(credentials_path)
-        logger.info("Authorizing gspread client...")
-        client = gspread.authorize(creds)
+        client = get_client(credentials_path)
         logger.info("Opening spreadsheet by key...")
         spreadsheet = client.open_by_key(sheet_id)
         worksheet = spreadsheet.sheet1
-        logger.info("Fetching all records from worksheet '%s'...", worksheet.title)
-        data = worksheet.get_all_records()
-        if not data:
+        logger.info("Fetching all values from worksheet '%s'...", worksheet.title)
+        # Raw list-of-lists: no per-row dicts or numericise pass; KPI columns are typed in _normalize_columns.
+        values = worksheet.get_all_values()
+        if len(values) < 2:
             logger.warning("Sheet is empty (no data rows)")
             return pd.DataFrame()
-        df = pd.DataFrame(data)
+        df = pd.DataFrame(values[1:], columns=values[0])
         df = _normalize_columns(df)
         logger.info("Sheet loaded successfully: %d rows, %d columns", len(df), len(df.columns))
         return df
@@ -83,6 +112,23 @@ def load_sheet_data(sheet_id: str, credentials_path: str = "credentials.json") -
 
 
 def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """Normalize column names: strip whitespace."""
+    """
+    Normalize column names (strip whitespace) and shrink dtypes once at load: text cells are
+    stripped, KPI columns become int32 (blanks -> 0), and the low-cardinality name columns
+    become categorical for filter/groupby.
+    """
     df.columns = [str(c).strip() for c in df.columns]
+    # Duplicate headers (e.g. several blank ones) collapse last-wins, as get_all_records' dicts did.
+    if df.columns.duplicated().any():
+        df = df.loc[:, ~df.columns.duplicated(keep="last")].copy()
+    df.attrs["cols_lower"] = tuple(c.lower() for c in df.columns)
+    # "string" covers pandas 3, where text columns use the str dtype instead of object.
+    for col in df.select_dtypes(include=["object", "string"]).columns:
+        df[col] = df[col].str.strip()
+    for col in NUMERIC_KPI_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype("int32")
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
     return df
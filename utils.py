@@ -3,11 +3,26 @@ Utilities for JSON parsing and aggregating event data.
 """
 
 import json
+import os
 import re
+import secrets
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
+import numpy as np
 import pandas as pd
 
+try:
+    import orjson
+except ImportError:  # optional: faster batch decoding of JSON count columns
+    orjson = None
 
+# Drop-in for json.loads (str or bytes); orjson's JSONDecodeError subclasses json's.
+fast_json_loads = orjson.loads if orjson is not None else json.loads
+
+_SHEET_ID_RE = re.compile(r"/d/([a-zA-Z0-9_-]+)")
+
+
+@lru_cache(maxsize=32)
 def extract_sheet_id(value: str) -> str:
     """
     Extract Google Sheet ID from pasted input.
@@ -18,7 +33,7 @@ def extract_sheet_id(value: str) -> str:
         return ""
     s = value.strip()
     # Match /d/SHEET_ID/ or /d/SHEET_ID (end or followed by ? or #)
-    m = re.search(r"/d/([a-zA-Z0-9_-]+)", s)
+    m = _SHEET_ID_RE.search(s)
     if m:
         return m.group(1)
     # Otherwise treat whole string as ID if it looks like one (no spaces, no ://)
@@ -27,100 +42,127 @@ def extract_sheet_id(value: str) -> str:
     return ""
 
 
-def safe_json_loads(value: Any) -> Optional[Dict[str, Any]]:
+def write_json_atomic(path: str, data: Any, **dump_kwargs: Any) -> None:
     """
-    Safely parse a JSON string into a dictionary.
-    Returns None for invalid/missing values.
+    Serialize data and write it to path in a single write, then swap it into place
+    with os.replace so readers never see a half-written file. The file keeps its
+    existing mode (new files get the usual 0666 & ~umask). Raises OSError on failure.
     """
-    if value is None or (isinstance(value, float) and pd.isna(value)):
-        return None
-    if isinstance(value, dict):
-        return value
-    if isinstance(value, str):
-        value = value.strip()
-        if not value or value in ("{}", "[]", ""):
-            return None
+    payload = json.dumps(data, **dump_kwargs)
+    try:
+        mode: Optional[int] = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = None
+    directory, name = os.path.split(os.path.abspath(path))
+    tmp = os.path.join(directory, f".{name}.{secrets.token_hex(8)}.tmp")
+    # 0666 lets the kernel apply the umask, as open() would for a new file.
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(payload)
+        if mode is not None:
+            os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
         try:
-            parsed = json.loads(value)
-            return parsed if isinstance(parsed, dict) else None
-        except (json.JSONDecodeError, TypeError):
-            return None
-    return None
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
 
 
-def merge_json_dicts(dicts: List[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+def find_column(df: pd.DataFrame, *keywords: str) -> Optional[str]:
     """
-    Merge multiple JSON dictionaries by summing numeric values for each key.
-    Used for aggregating Gender, Country, State, Occupation, etc. across events.
+    Return the first column whose stripped, lower-cased name contains every keyword.
+    Uses the pre-normalized names the sheet loader stores in df.attrs["cols_lower"].
     """
-    result: Dict[str, Any] = {}
-    for d in dicts:
-        if not d:
-            continue
-        for key, val in d.items():
-            if key not in result:
-                result[key] = 0
-            try:
-                result[key] += int(val) if isinstance(val, (int, float)) else 0
-            except (TypeError, ValueError):
-                pass
-    return result
+    if df is None or df.columns is None:
+        return None
+    lowered = df.attrs.get("cols_lower")
+    if lowered is None or len(lowered) != len(df.columns):
+        lowered = tuple(str(c).strip().lower() for c in df.columns)
+    lower_kw = tuple(k.lower() for k in keywords)
+    for orig, low in zip(df.columns, lowered):
+        if all(k in low for k in lower_kw):
+            return orig
+    return None
 
 
-def parse_daily_registrations(series: pd.Series) -> Dict[str, int]:
-    """
-    Parse 'Daily Registrations (JSON)' column(s) from selected rows.
-    Combine all date->count mappings and sum counts per date.
-    Returns dict: date_str -> total_count
-    """
-    combined: Dict[str, int] = {}
-    for val in series.dropna():
-        d = safe_json_loads(val)
-        if not d:
-            continue
-        for date_str, count in d.items():
-            try:
-                combined[date_str] = combined.get(date_str, 0) + int(count)
-            except (TypeError, ValueError):
-                pass
-    return combined
-
-
-def daily_registrations_to_line_data(combined: Dict[str, int]) -> tuple[List[str], List[int]]:
+def _loads_cell(text: str) -> Optional[Dict[str, Any]]:
+    """Batch-path decode of a stripped cell: only JSON objects are parsed, anything else is None."""
+    if not text or text[0] != "{":
+        return None
+    try:
+        return fast_json_loads(text)
+    except ValueError:
+        return None
+
+
+def _json_counts_long(series: pd.Series) -> pd.DataFrame:
+    """Explode a column of JSON count objects into long (key, count) rows; non-numeric counts are 0."""
+    parsed = series.dropna().astype(str).str.strip().map(_loads_cell).dropna()
+    return pd.DataFrame(
+        [(k, v if isinstance(v, (int, float)) else 0) for obj in parsed for k, v in obj.items()],
+        columns=["key", "count"],
+    )
+
+
+def aggregate_all_json(df: pd.DataFrame, cols: List[str]) -> Dict[str, Dict[str, int]]:
     """
-    Convert merged daily registrations dict to sorted (dates, counts) for Plotly.
+    Sum several JSON count columns at once into {column: {label: total}}.
+    Every column is exploded into one long (column, key, count) frame and reduced with a
+    single groupby, so there is no per-column merging in Python. Labels come back
+    display-normalized (stripped, blank -> "(Unknown)"); missing columns are left out.
     """
-    if not combined:
-        return [], []
-    sorted_items = sorted(combined.items(), key=lambda x: x[0])
-    dates = [item[0] for item in sorted_items]
-    counts = [item[1] for item in sorted_items]
-    return dates, counts
+    present = [c for c in cols if c in df.columns]
+    result: Dict[str, Dict[str, int]] = {c: {} for c in present}
+    if not present:
+        return result
+    long = pd.concat(
+        [_json_counts_long(df[c]) for c in present], keys=present, names=["column", None]
+    ).reset_index(level="column")
+    if long.empty:
+        return result
+    # Each value is truncated before summing and NaN/inf count as 0, as int() per value did;
+    # keys whose values aren't numbers are kept with a 0 total.
+    raw = long["count"].to_numpy(dtype=float)
+    counts = pd.Series(np.where(np.isfinite(raw), np.trunc(raw), 0).astype(np.int64))
+    stripped = long["key"].astype(str).str.strip()
+    labels = stripped.where(stripped != "", "(Unknown)")
+    # Plain arrays as keys: the concatenated index repeats per column, so don't align on it.
+    totals = counts.groupby([long["column"].to_numpy(), labels.to_numpy()], sort=False).sum()
+    for (col, label), total in totals.items():
+        result[col][label] = int(total)
+    return result
 
 
-def normalize_chart_label(key: Any) -> str:
+def daily_registrations_line_data(series: pd.Series) -> tuple[List[str], List[int]]:
     """
-    Return a display label for chart legends. Empty or whitespace keys (e.g. from JSON \"\")
-    become \"(Unknown)\" so Plotly does not show them as \"1\" or blank.
+    Parse a 'Daily Registrations' column straight to sorted (dates, counts) for Plotly.
+    Counts are summed per date with factorize + bincount in one C-level pass.
     """
-    if key is None:
-        return "(Unknown)"
-    s = str(key).strip()
-    return s if s else "(Unknown)"
+    dates: List[str] = []
+    counts: List[Any] = []
+    for obj in series.dropna().astype(str).str.strip().map(_loads_cell).dropna():
+        dates.extend(obj.keys())
+        counts.extend(obj.values())
+    if not dates:
+        return [], []
+    vals = pd.to_numeric(pd.Series(counts, dtype=object), errors="coerce").to_numpy(dtype=float)
+    ok = ~np.isnan(vals)
+    if not ok.any():
+        return [], []
+    codes, uniq = pd.factorize(np.asarray(dates, dtype=object)[ok])
+    sums = np.bincount(codes, weights=vals[ok].astype(np.int64), minlength=len(uniq))
+    order = np.argsort(uniq, kind="stable")
+    return uniq[order].tolist(), sums[order].astype(np.int64).tolist()
 
 
 def aggregate_numeric_columns(df: pd.DataFrame, columns: List[str]) -> Dict[str, int]:
-    """Sum numeric columns over the filtered dataframe. Returns column_name -> sum."""
-    result = {}
-    for col in columns:
-        if col not in df.columns:
-            result[col] = 0
-            continue
-        try:
-            result[col] = int(pd.to_numeric(df[col], errors="coerce").fillna(0).sum())
-        except (TypeError, ValueError):
-            result[col] = 0
-    return result
+    """Sum numeric columns over the filtered dataframe in one reduction. Returns column_name -> sum."""
+    present = [c for c in columns if c in df.columns]
+    sums = df[present].apply(pd.to_numeric, errors="coerce").fillna(0).sum() if present else {}
+    return {col: int(sums[col]) if col in present else 0 for col in columns}
 
 
 # Column name constants (match sheet headers)